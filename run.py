@@ -9,103 +9,391 @@ Features:
 - Playlist parameter stripping (unless --allow-playlist)
 - Timeout protection to prevent hanging
 - Album artwork embedding
+
+Environment variables:
+- YTMP3_SKIP_TAG=1       do not tag downloaded MP3s at all
+- YTMP3_SKIP_METADATA=1  skip the online lookups (and artwork download); tag with yt-dlp's own
+                         track/artist/album fields when present, else the video title/uploader
 """
 
 import argparse
+import contextlib
+import copy
+import functools
+import hashlib
+import io
+import json
+import operator
 import os
 import sys
 import shutil
 import re
-import signal
+import subprocess
+import sqlite3
+import threading
+import time
 import unicodedata
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Optional, Tuple, Dict, Any
+from typing import Iterable, Iterator, List, Optional, Set, Tuple, Dict, Any
 from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from yt_dlp import YoutubeDL
 from yt_dlp.utils import DownloadError
-from mutagen.easyid3 import EasyID3
-from mutagen.id3 import ID3, APIC, ID3NoHeaderError, TIT2, TPE1, TALB, TDRC, TCON, TPE2, COMM, TSSE
-from mutagen.mp3 import MP3
+from mutagen.id3 import ID3, APIC, ID3NoHeaderError, TIT2, TPE1, TALB, TDRC, TCON, TPE2, TRCK, COMM, TSSE
+
+try:
+    import orjson  # optional: faster JSON decoding of API responses
+except ImportError:
+    orjson = None
+
+try:
+    import re2 as _title_re  # optional: linear-time (no backtracking) engine for title cleaning
+except ImportError:
+    _title_re = re
+
+try:
+    from PIL import Image  # optional: shrink cover art before embedding
+except ImportError:
+    Image = None
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 DEFAULT_OUTDIR = SCRIPT_DIR / "downloads"
 DEFAULT_LISTFILE = SCRIPT_DIR / "download.txt"
 ITUNES_SEARCH_URL = "https://itunes.apple.com/search"
+# Ask intermediaries for a fresh answer; the local cache is what saves the round trip
+ITUNES_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'User-Agent': 'YoutubeMp3Converter/1.0',
+}
+META_CACHE_PATH = SCRIPT_DIR / ".metadata_cache.sqlite"
+ARTWORK_CACHE_DIR = SCRIPT_DIR / ".artwork_cache"
+CACHE_TTL_SECONDS = 30 * 24 * 3600  # 30 days
+NEGATIVE_CACHE_TTL_SECONDS = 24 * 3600  # re-ask about titles with no match after a day
+DEFAULT_FRAGMENT_CONCURRENCY = 4
+DEFAULT_JOBS = 4
+MIN_MP3_BYTES = 4096  # anything smaller is a failed/empty transcode
+HTTP_CHUNK_SIZE = 16 * 1024 * 1024  # 16 MiB
+# Only these extractors are instantiated per YoutubeDL (regexes over extractor names), instead of ~1800
+ALLOWED_EXTRACTORS = ['youtube.*', 'generic']
+DOWNLOAD_ATTEMPTS = 3  # tries for transient network errors before the fallback ladder
+DOWNLOAD_CACHE_NAME = ".yt2mp3_cache.json"  # kept in the output directory
+INFO_CACHE_TTL_SECONDS = 300  # fallbacks run within minutes; stream URLs stay valid for hours
+COVER_SIZES = (300, 500, 600)
+DEFAULT_COVER_SIZE = 500
+MUSICBRAINZ_URL = "https://musicbrainz.org/ws/2/recording"
+MUSICBRAINZ_MIN_INTERVAL = 1.0  # seconds between requests, per MusicBrainz's rate-limit policy
+ITUNES_HEAD_START_SECONDS = 1.5  # MusicBrainz is only queried if iTunes hasn't matched by then
+MUSICBRAINZ_USER_AGENT = "YoutubeMp3Converter/1.0 (your-email@example.com)"  # Required by MusicBrainz
+
+
+def _make_session(host: str) -> requests.Session:
+    """Build a pooled session so requests to `host` reuse TCP+TLS connections across tracks."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip"})
+    if host == "musicbrainz.org":
+        session.headers.update({"User-Agent": MUSICBRAINZ_USER_AGENT})
+    return session
+
+
+def get_session(host: str) -> requests.Session:
+    """Return the shared keep-alive session for `host`, creating it on first use.
+
+    Only connections are reused between lookups; every request still builds its own
+    params, so there is no metadata leakage between songs.
+    """
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(host)
+        if session is None:
+            session = _SESSIONS[host] = _make_session(host)
+    return session
+
+
+def parse_json(content: bytes) -> Any:
+    """Decode an HTTP JSON body, using orjson when it is installed."""
+    return orjson.loads(content) if orjson else json.loads(content)
+
+
+_SESSIONS: Dict[str, requests.Session] = {}
+_SESSIONS_LOCK = threading.Lock()
+
+# Serializes console output when several URLs are processed in parallel (--jobs)
+_PRINT_LOCK = threading.Lock()
+_output = threading.local()
+
+
+class _ThreadStdout:
+    """sys.stdout stand-in that sends a thread's writes into its buffered_output() buffer, if open."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, s: str) -> int:
+        buf = getattr(_output, 'buf', None)
+        return buf.write(s) if buf is not None else self.stream.write(s)
+
+    def flush(self):
+        if getattr(_output, 'buf', None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def _terminal():
+    return getattr(sys.stdout, 'stream', sys.stdout)
+
+
+def output_label() -> str:
+    """The label ("[2/5]") of the current thread's buffered_output() block, or ''."""
+    return getattr(_output, 'label', None) or ''
+
+
+def _labelled(text: str, label: str) -> str:
+    return ''.join(f"{label} {line}" for line in text.splitlines(True)) if label else text
+
+
+@contextlib.contextmanager
+def buffered_output(label: str = ''):
+    """Collect everything the current thread prints and emit it as one write at the end.
+
+    Keeps each URL's log in one piece when --jobs runs several at once, and costs one
+    write per URL instead of one per line. label marks the block's live progress lines
+    and any pool-task output that arrives after the block was written.
+    """
+    if getattr(_output, 'buf', None) is not None:
+        yield
+        return
+    buf = _output.buf = io.StringIO()
+    _output.label = label
+    try:
+        yield
+    finally:
+        _output.buf = None
+        _output.label = None
+        with _PRINT_LOCK:
+            out = _terminal()
+            out.write(buf.getvalue())
+            out.flush()
+            buf.close()
+
+
+def with_caller_output(fn, *args):
+    """Wrap fn(*args) for an executor so its prints join the submitting thread's output.
+
+    Lookups, prefetches and transcodes for a URL run on shared pools and can finish after
+    the URL's block has been written. The task prints into its own buffer, which is appended
+    to the caller's block in one piece if that is still open, or else written as one locked
+    write with every line prefixed by the caller's label.
+    """
+    owner = getattr(_output, 'buf', None)
+    label = output_label()
+
+    def task():
+        buf = _output.buf = io.StringIO()
+        _output.label = label
+        try:
+            return fn(*args)
+        finally:
+            _output.buf = None
+            _output.label = None
+            text = buf.getvalue()
+            buf.close()
+            if text:
+                with _PRINT_LOCK:
+                    if owner is not None and not owner.closed:
+                        owner.write(text)
+                    else:
+                        out = _terminal()
+                        out.write(_labelled(text, label))
+                        out.flush()
+    return task
+
+
+def print_now(*values, **kwargs):
+    """print() straight to the terminal, past any output buffer (for live progress)."""
+    with _PRINT_LOCK:
+        print(*values, file=_terminal(), **kwargs)
+
+
+class _BufLogger:
+    """yt-dlp logger that goes through print(), so its lines land in the URL's output buffer.
+
+    yt-dlp consults a logger before its quiet/no_warnings params, so this logger applies
+    them itself: screen and warning lines only with --verbose, errors always.
+    """
+
+    def __init__(self, verbose: bool = False):
+        self.verbose = verbose
+
+    def debug(self, msg):
+        # yt-dlp sends info messages through debug() as well; real debug lines are prefixed
+        if not msg.startswith('[debug] '):
+            self.info(msg)
+
+    def info(self, msg):
+        if self.verbose:
+            print(msg)
 
+    def warning(self, msg):
+        if self.verbose:
+            print(f"WARNING: {msg}")
 
+    def error(self, msg):
+        print(msg)
+
+
+_unicode_normalize = unicodedata.normalize
+
+
+@functools.lru_cache(maxsize=1024)
 def normalize_unicode_text(text: str) -> str:
     """
     Normalize Unicode text for better compatibility with metadata APIs and file systems.
     Handles Persian, Arabic, and other Unicode characters properly.
+    Pure over str, so results are memoized for titles that repeat within a batch.
     """
     if not text:
         return text
     
     # Normalize Unicode to NFC form (canonical composition)
-    normalized = unicodedata.normalize('NFC', text)
+    normalized = _unicode_normalize('NFC', text)
     
     # Clean up any problematic characters for filenames while preserving Unicode content
     # Note: We don't remove Unicode chars, just normalize them
     return normalized.strip()
 
 
+class DeadlineHook:
+    """Progress hook that aborts a download once its TimeoutHandler deadline has passed.
+
+    Raising from a progress hook stops yt-dlp's download loop from whichever thread runs it,
+    so unlike SIGALRM this works on --jobs worker threads. Stuck sockets are covered
+    separately by socket_timeout.
+    """
+
+    def __init__(self):
+        self.deadline: Optional[float] = None
+        self.timeout_seconds = 0
+
+    def __call__(self, d):
+        # Only abort mid-transfer; raising on 'finished'/'error' or on the last tick of a
+        # complete read would throw away a download that already succeeded.
+        if d.get('status') != 'downloading':
+            return
+        total = d.get('total_bytes') or d.get('total_bytes_estimate')
+        if total and d.get('downloaded_bytes', 0) >= total:
+            return
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise TimeoutError(f"Operation timed out after {self.timeout_seconds} seconds")
+
+
+# Largest socket read while a deadline is armed. Progress hooks only run between reads, so
+# this bounds how late DeadlineHook can fire on a throttled connection.
+DEADLINE_READ_SIZE = 64 * 1024
+
+
 class TimeoutHandler:
-    def __init__(self, timeout_seconds=120):
+    def __init__(self, ydl: YoutubeDL, timeout_seconds=120):
         self.timeout_seconds = timeout_seconds
-        self.old_handler = None
+        self.params = ydl.params
+        hooks = ydl.params.get('progress_hooks') or []
+        self.hook = next((h for h in hooks if isinstance(h, DeadlineHook)), None)
+        self.saved_read_opts: Dict[str, Any] = {}
     
     def __enter__(self):
-        def timeout_handler(signum, frame):
-            raise TimeoutError(f"Operation timed out after {self.timeout_seconds} seconds")
-        self.old_handler = signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(self.timeout_seconds)
+        if self.hook is not None:
+            self.hook.timeout_seconds = self.timeout_seconds
+            self.hook.deadline = time.monotonic() + self.timeout_seconds
+            # Fixed, small reads: yt-dlp would otherwise grow the block size up to 4 MiB
+            self.saved_read_opts = {k: self.params.get(k) for k in ('buffersize', 'noresizebuffer')}
+            self.params['buffersize'] = min(self.params.get('buffersize') or DEADLINE_READ_SIZE, DEADLINE_READ_SIZE)
+            self.params['noresizebuffer'] = True
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        signal.alarm(0)
-        if self.old_handler:
-            signal.signal(signal.SIGALRM, self.old_handler)
+        if self.hook is not None:
+            self.hook.deadline = None
+            self.params.update(self.saved_read_opts)
+
+
+_PROGRESS_INTERVAL = 0.1  # redraw each download's progress line at most 10x per second
+_last_progress: Dict[str, float] = {}  # filename → last redraw, so --jobs downloads don't throttle each other
 
 
 def progress_hook(d):
+    key = d.get('filename') or ''
     if d.get('status') == 'downloading':
+        now = time.monotonic()
+        if now - _last_progress.get(key, 0.0) < _PROGRESS_INTERVAL:
+            return
+        _last_progress[key] = now
         total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
         done = d.get('downloaded_bytes', 0)
         pct = f"{(done/total*100):.1f}%" if total else "?%"
         speed = d.get('speed')
         spd = f" @ {speed/1_000_000:.2f} MB/s" if speed else ""
-        print(f"Downloading… {pct}{spd}", end="\r", flush=True)
+        print_now(_labelled(f"Downloading… {pct}{spd}", output_label()), end="\r", flush=True)
     elif d.get('status') == 'finished':
-        print("\nConverting to MP3…")
+        _last_progress.pop(key, None)
+        print_now()  # end the live progress line; the rest of the log stays in the URL's block
+        print("Converting to MP3…")
+    elif d.get('status') == 'error':
+        _last_progress.pop(key, None)
 
 
-def ensure_ffmpeg():
-    if not shutil.which('ffmpeg'):
+@functools.lru_cache(maxsize=None)
+def ensure_ffmpeg() -> str:
+    """Return the absolute ffmpeg path, resolved from PATH once per process."""
+    path = shutil.which('ffmpeg')
+    if not path:
         sys.exit("Error: ffmpeg not found. On macOS with Homebrew: `brew install ffmpeg`.")
+    return path
 
 
 # ---------- URL handling ----------
+# Fast path for the two common shapes: youtube.com/watch?...v=<id> and youtu.be/<id>
+_YT_FAST = re.compile(
+    r'^https?://(?:www\.|m\.)?(?:youtube\.com/watch\?(?:[^#]*&)?v=([A-Za-z0-9_-]{11})|youtu\.be/([A-Za-z0-9_-]{11}))(?![A-Za-z0-9_-])'
+)
+
+
+_PLAYLIST_PARAMS = frozenset({"list", "index", "start_radio", "pp", "playlist", "playnext", "si", "t"})
+
+
 def normalize_url(u: str, allow_playlist: bool) -> str:
     """Return a single-video watch URL unless playlists are explicitly allowed."""
+    if not allow_playlist:
+        m = _YT_FAST.match(u)
+        if m:
+            return f"https://www.youtube.com/watch?v={m.group(1) or m.group(2)}"
     try:
         p = urlparse(u)
         # Expand youtu.be links to standard /watch
         if p.netloc in {"youtu.be", "www.youtu.be"}:
             vid = p.path.lstrip('/')
+            if vid and not allow_playlist:
+                # Everything but the id is dropped anyway; skip the query round trip
+                return f"https://www.youtube.com/watch?v={vid}"
             q = dict(parse_qsl(p.query))
-            if not allow_playlist:
-                q = {"v": vid} if vid else q
             new = p._replace(netloc="www.youtube.com", path="/watch", query=urlencode(q, doseq=True))
             return urlunparse(new)
         # Tidy youtube.com watch links
         if "youtube.com" in p.netloc:
-            q = dict(parse_qsl(p.query))
-            if not allow_playlist:
-                # Hard-strip playlist-ish params
-                for key in ["list", "index", "start_radio", "pp", "playlist", "playnext", "si", "t"]:
-                    q.pop(key, None)
+            if not p.query:
+                return u
+            # Hard-strip playlist-ish params unless playlists are allowed
+            q = {k: v for k, v in parse_qsl(p.query) if allow_playlist or k not in _PLAYLIST_PARAMS}
             new = p._replace(query=urlencode(q, doseq=True))
             return urlunparse(new)
     except Exception:
@@ -113,11 +401,108 @@ def normalize_url(u: str, allow_playlist: bool) -> str:
     return u
 
 
+# ---------- Metadata cache ----------
+_CACHE_LOCK = threading.Lock()
+_cache_conn: Optional[sqlite3.Connection] = None
+_CACHE_ID_SUFFIX_RE = re.compile(r'\s*\[[A-Za-z0-9_-]{11}\]\s*$')
+
+
+def normalize_cache_query(title: str) -> str:
+    """Lowercase, collapse whitespace and drop a trailing `[video_id]` so equivalent titles share a cache key."""
+    query = _CACHE_ID_SUFFIX_RE.sub('', title)
+    return ' '.join(query.lower().split())
+
+
+def _get_cache_conn() -> Optional[sqlite3.Connection]:
+    """Open (once) the on-disk metadata cache. Returns None if the cache file can't be used."""
+    global _cache_conn
+    if _cache_conn is None:
+        try:
+            conn = sqlite3.connect(str(META_CACHE_PATH), check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS lookups ("
+                "service TEXT, query TEXT, ts INTEGER, json TEXT, PRIMARY KEY (service, query))"
+            )
+            conn.commit()
+            _cache_conn = conn
+        except sqlite3.Error as e:
+            print(f"⚠ Metadata cache unavailable: {e}")
+            return None
+    return _cache_conn
+
+
+def _cache_get(service: str, query: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    """Return (hit, result). A hit may carry None: a remembered "no match"."""
+    with _CACHE_LOCK:
+        conn = _get_cache_conn()
+        if conn is None:
+            return False, None
+        try:
+            row = conn.execute("SELECT ts, json FROM lookups WHERE service = ? AND query = ?", (service, query)).fetchone()
+        except sqlite3.Error:
+            return False, None
+    if not row:
+        return False, None
+    result = json.loads(row[1])
+    ttl = CACHE_TTL_SECONDS if result is not None else NEGATIVE_CACHE_TTL_SECONDS
+    if time.time() - row[0] > ttl:
+        return False, None
+    return True, result
+
+
+def _cache_put(service: str, query: str, result: Optional[Dict[str, Any]]):
+    with _CACHE_LOCK:
+        conn = _get_cache_conn()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO lookups (service, query, ts, json) VALUES (?, ?, ?, ?)",
+                (service, query, int(time.time()), json.dumps(result)),
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠ Could not write metadata cache: {e}")
+
+
+def cached_lookup(service: str):
+    """Decorate a title lookup with an in-process LRU and the on-disk cache, keyed by (service, normalized title).
+
+    Matches are kept for 30 days and "no match" answers for 1 day. Lookups that raise
+    (network errors etc.) are not cached and return None. Callers get their own copy
+    of the result so tagging tweaks never leak into the cache.
+    """
+    def decorator(fn):
+        @functools.lru_cache(maxsize=4096)
+        def cached(query: str) -> Optional[Dict[str, Any]]:
+            hit, result = _cache_get(service, query)
+            if hit:
+                return result
+            result = fn(query)
+            _cache_put(service, query, result)
+            return result
+
+        @functools.wraps(fn)
+        def wrapper(title: str) -> Optional[Dict[str, Any]]:
+            try:
+                result = cached(normalize_cache_query(title))
+            except Exception:
+                return None
+            return dict(result) if result else None
+        return wrapper
+    return decorator
+
+
 # ---------- Enhanced Metadata helpers ----------
+# Separate from the prefetch pool so a prefetch waiting on its lookups can't starve them
+_LOOKUP_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="meta-lookup")
+
+
 def get_music_metadata_from_title(title: str) -> Optional[Dict[str, Any]]:
     """
     Get music metadata from title using online services.
-    Simplified to use iTunes first, then fallbacks.
+    iTunes goes first; MusicBrainz is only asked if iTunes misses or is still running after
+    a short head start, and then runs alongside it. iTunes wins when it has a match.
     Each call is isolated to prevent metadata leakage between different songs.
     """
     # Clean up title - remove common YouTube additions
@@ -125,82 +510,111 @@ def get_music_metadata_from_title(title: str) -> Optional[Dict[str, Any]]:
     
     print(f"Looking up metadata for: '{clean_title}'")
     
-    # Try iTunes first (most reliable and fast)
-    try:
-        result = lookup_itunes_direct(clean_title)
-        if result and result.get('title'):
-            print(f"✓ Metadata found via iTunes")
-            return result
-    except Exception as e:
-        print(f"⚠ iTunes lookup failed: {e}")
-    
-    # Try MusicBrainz as fallback
+    itunes = _LOOKUP_EXECUTOR.submit(with_caller_output(lookup_itunes_by_title, clean_title))  # most reliable, has artwork
+    lookups = [("iTunes", itunes)]
     try:
-        result = lookup_musicbrainz(clean_title)
-        if result and result.get('title'):
-            print(f"✓ Metadata found via MusicBrainz")
-            return result
-    except Exception as e:
-        print(f"⚠ MusicBrainz lookup failed: {e}")
+        itunes_hit = bool((itunes.result(timeout=ITUNES_HEAD_START_SECONDS) or {}).get('title'))
+    except Exception:  # still running (or failed; reported below)
+        itunes_hit = False
+    if not itunes_hit:
+        # A slow iTunes costs at most the head start, not a full second round trip
+        lookups.append(("MusicBrainz", _LOOKUP_EXECUTOR.submit(with_caller_output(lookup_musicbrainz, clean_title))))
+    for service, fut in lookups:
+        try:
+            result = fut.result()
+            if result and result.get('title'):
+                print(f"✓ Metadata found via {service}")
+                for _, other in lookups:
+                    other.cancel()
+                return result
+        except Exception as e:
+            print(f"⚠ {service} lookup failed: {e}")
     
     print("✗ No metadata found from any service")
     return None
 
 
+# Common YouTube additions; everything from the first one to the end of the title is dropped
+_TITLE_NOISE_TAGS = [
+    r'\(Official Video\)',
+    r'\(Official Music Video\)',
+    r'\(Official Audio\)',
+    r'\(Lyric Video\)',
+    r'\(Live\)',
+    r'\(HD\)',
+    r'\(4K\)',
+    r'\[Official Video\]',
+    r'\[Official Music Video\]',
+    r'\[Official Audio\]',
+]
+_TITLE_NOISE_RE = _title_re.compile(r'(?i)\s*(?:' + '|'.join(_TITLE_NOISE_TAGS) + r').*$')
+# Channel-style suffixes, only when they end the (already trimmed) title: "... VEVO - Topic"
+_TITLE_SUFFIX_RE = _title_re.compile(r'(?i)(?:\s*VEVO)?(?:\s*- Topic)?$')
+
+
 def clean_youtube_title(title: str) -> str:
     """
     Clean YouTube title by removing common additions and noise.
     Preserves Unicode characters for Persian and other international content.
     """
-    # Normalize Unicode text first
-    title = normalize_unicode_text(title)
-    
     # Remove common YouTube suffixes while preserving Unicode content
-    patterns_to_remove = [
-        r'\s*\(Official Video\).*$',
-        r'\s*\(Official Music Video\).*$',
-        r'\s*\(Official Audio\).*$',
-        r'\s*\(Lyric Video\).*$',
-        r'\s*\(Live\).*$',
-        r'\s*\(HD\).*$',
-        r'\s*\(4K\).*$',
-        r'\s*\[Official Video\].*$',
-        r'\s*\[Official Music Video\].*$',
-        r'\s*\[Official Audio\].*$',
-        r'\s*- Topic$',
-        r'\s*VEVO$',
-    ]
-    
-    cleaned = title
-    for pattern in patterns_to_remove:
-        cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
-    
-    return cleaned.strip()
+    cleaned = _TITLE_NOISE_RE.sub('', normalize_unicode_text(title))
+    return _TITLE_SUFFIX_RE.sub('', cleaned).strip()
+
+
+_ARTIST_TITLE_RE = re.compile(r"^(.+?)\s+[-–]\s+(.+)$")
+
+
+def split_artist_title(title: str) -> Optional[Tuple[str, str]]:
+    """Split "Artist - Song" into (artist, song); None if the title has no separator."""
+    m = _ARTIST_TITLE_RE.match(title)
+    return (m.group(1), m.group(2)) if m else None
+
+
+def lookup_itunes_by_title(clean_title: str) -> Optional[Dict[str, Any]]:
+    """
+    iTunes lookup for a cleaned video title.
+    "Artist - Song" titles are searched as "Song Artist", which iTunes ranks far better
+    than the raw title; the full title is still tried if that finds nothing.
+    """
+    parts = split_artist_title(clean_title)
+    if parts:
+        artist, track = parts
+        result = lookup_itunes_direct(f"{track} {artist}")
+        if result:
+            return result
+    return lookup_itunes_direct(clean_title)
+
 
+_MUSICBRAINZ_LOCK = threading.Lock()
+_musicbrainz_last_request = 0.0
 
+
+def _musicbrainz_rate_limit():
+    """Block until a MusicBrainz request keeps the whole process under 1 request per second."""
+    global _musicbrainz_last_request
+    with _MUSICBRAINZ_LOCK:
+        delay = _musicbrainz_last_request + MUSICBRAINZ_MIN_INTERVAL - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        _musicbrainz_last_request = time.monotonic()
+
+
+@cached_lookup('musicbrainz')
 def lookup_musicbrainz(title: str) -> Optional[Dict[str, Any]]:
     """
     Look up music metadata using MusicBrainz API.
     Most comprehensive and accurate music database.
-    Uses a fresh session for each lookup to prevent data leakage.
+    Uses the pooled musicbrainz.org session (which carries the required User-Agent).
     """
-    import urllib.parse
-    
-    # MusicBrainz search API
-    base_url = "https://musicbrainz.org/ws/2/recording"
-    query = urllib.parse.quote(title)
-    url = f"{base_url}?query={query}&fmt=json&limit=5"
-    
-    headers = {
-        'User-Agent': 'YoutubeMp3Converter/1.0 (your-email@example.com)'  # Required by MusicBrainz
-    }
+    # MusicBrainz search API; requests does the query-string encoding
+    params = {'query': title, 'fmt': 'json', 'limit': 5}
     
     try:
-        # Use a fresh session for each request to prevent caching/state issues
-        with requests.Session() as session:
-            response = session.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+        _musicbrainz_rate_limit()
+        response = get_session("musicbrainz.org").get(MUSICBRAINZ_URL, params=params, timeout=10)
+        response.raise_for_status()
+        data = parse_json(response.content)
         
         recordings = data.get('recordings', [])
         if not recordings:
@@ -248,84 +662,157 @@ def lookup_musicbrainz(title: str) -> Optional[Dict[str, Any]]:
         
     except Exception as e:
         print(f"MusicBrainz lookup error: {e}")
-        return None
+        raise
 
 
+@cached_lookup('itunes')
 def lookup_itunes_direct(title: str) -> Optional[Dict[str, Any]]:
     """
     Direct iTunes Search API lookup using the full title.
     Good for popular music and accurate metadata.
-    Uses a fresh session for each lookup to prevent data leakage.
+    Uses the pooled itunes.apple.com session.
     """
     try:
         params = {
             'term': title,
             'media': 'music',
             'entity': 'song',
-            'limit': 5
+            'limit': 5,
+            'version': 2,
         }
-        
-        # Use a fresh session for each request to prevent caching/state issues
-        with requests.Session() as session:
-            response = session.get(ITUNES_SEARCH_URL, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+        response = get_session("itunes.apple.com").get(ITUNES_SEARCH_URL, params=params, headers=ITUNES_HEADERS, timeout=10)
+        response.raise_for_status()
+        data = parse_json(response.content)
         
         if data.get('resultCount', 0) == 0:
             return None
         
-        # Get best match based on title similarity
+        # Get best match based on title similarity, tracking the fallback in the same pass
         results = data['results']
         best_match = None
         best_score = 0
+        first_non_various = None
         
-        title_words = set(title.lower().split())
+        title_words = frozenset(title.lower().split())
         
         for result in results:
-            track_name = result.get('trackName', '').lower()
-            artist_name = result.get('artistName', '').lower()
+            artist_name = result.get('artistName', '')
             
             # Skip "Various Artists" results unless it's the only option
-            if artist_name == 'various artists':
+            if artist_name.lower() == 'various artists':
                 continue
+            if first_non_various is None:
+                first_non_various = result
             
-            # Calculate similarity score
-            track_words = set(track_name.split())
-            artist_words = set(artist_name.split())
-            all_result_words = track_words | artist_words
-            
-            # Score based on word overlap
-            common_words = title_words & all_result_words
-            score = len(common_words) / len(title_words) if title_words else 0
+            # Score based on word overlap with track + artist names
+            result_words = frozenset(f"{result.get('trackName', '')} {artist_name}".lower().split())
+            score = len(title_words & result_words) / len(title_words) if title_words else 0
             
             if score > best_score and score > 0.3:  # At least 30% word overlap
                 best_score = score
                 best_match = result
         
-        if not best_match:
-            # If no good match found, try to find any non-"Various Artists" result
-            for result in results:
-                if result.get('artistName', '').lower() != 'various artists':
-                    best_match = result
-                    break
-            # Last resort: use first result even if it's "Various Artists"
-            if not best_match:
-                best_match = results[0]
+        # If no good match found, use any non-"Various Artists" result, else the first one
+        best_match = best_match or first_non_various or results[0]
         
-        return {
-            'title': best_match.get('trackName', ''),
-            'artist': best_match.get('artistName', ''),
-            'album': best_match.get('collectionName', ''),
-            'album_artist': best_match.get('artistName', ''),
-            'genre': best_match.get('primaryGenreName', ''),
-            'date': best_match.get('releaseDate', '')[:4] if best_match.get('releaseDate') else '',
-            'track_number': str(best_match.get('trackNumber', '')) if best_match.get('trackNumber') else '',
-            'artwork_url': best_match.get('artworkUrl100', '').replace('100x100bb', '600x600bb') if best_match.get('artworkUrl100') else '',
-        }
+        return itunes_track_metadata(best_match)
         
     except Exception as e:
         print(f"iTunes lookup error: {e}")
+        raise
+
+
+def itunes_track_metadata(track: Dict[str, Any]) -> Dict[str, Any]:
+    """Map one iTunes Search API song result onto our metadata dict."""
+    return {
+        'title': track.get('trackName', ''),
+        'artist': track.get('artistName', ''),
+        'album': track.get('collectionName', ''),
+        'album_artist': track.get('artistName', ''),
+        'genre': track.get('primaryGenreName', ''),
+        'date': track.get('releaseDate', '')[:4] if track.get('releaseDate') else '',
+        'track_number': str(track.get('trackNumber', '')) if track.get('trackNumber') else '',
+        'artwork_url': track.get('artworkUrl100', '').replace('100x100bb', '600x600bb') if track.get('artworkUrl100') else '',
+    }
+
+
+@cached_lookup('itunes-album-rows')
+def lookup_itunes_album(term: str) -> Optional[Dict[str, Any]]:
+    """
+    One iTunes search for a whole playlist (term = playlist title + uploader, up to 200 songs).
+    Returns {normalized track title: [metadata, ...]} in relevance order, one row per artist,
+    so each song can be matched locally on title and artist.
+    """
+    params = {
+        'term': term,
+        'media': 'music',
+        'entity': 'song',
+        'limit': 200,
+        'version': 2,
+    }
+    try:
+        response = get_session("itunes.apple.com").get(ITUNES_SEARCH_URL, params=params, headers=ITUNES_HEADERS, timeout=10)
+        response.raise_for_status()
+        data = parse_json(response.content)
+    except Exception as e:
+        print(f"iTunes album lookup error: {e}")
+        raise
+
+    index: Dict[str, Any] = {}
+    for track in data.get('results', []):
+        name = track.get('trackName')
+        if not name or track.get('artistName', '').lower() == 'various artists':
+            continue
+        # Results come in relevance order; keep the best row per (title, artist)
+        rows = index.setdefault(normalize_cache_query(name), [])
+        artist = normalize_cache_query(track.get('artistName', ''))
+        if all(normalize_cache_query(row['artist']) != artist for row in rows):
+            rows.append(itunes_track_metadata(track))
+    return index or None
+
+
+_ALBUM_CACHE: Dict[str, Future] = {}
+_ALBUM_LOCK = threading.Lock()
+
+
+def _prefetch_album_itunes(playlist_id: str, playlist_title: str, uploader: Optional[str]):
+    """Start the playlist-wide iTunes search once per playlist; songs pick their rows from it."""
+    with _ALBUM_LOCK:
+        if playlist_id not in _ALBUM_CACHE:
+            term = ' '.join(filter(None, [clean_youtube_title(playlist_title), uploader]))
+            _ALBUM_CACHE[playlist_id] = _LOOKUP_EXECUTOR.submit(with_caller_output(lookup_itunes_album, term))
+
+
+def _artist_matches(wanted: str, row_artist: str) -> bool:
+    """True if the artist from an "Artist - Song" title names the row's artist (or one of its credits)."""
+    wanted, have = normalize_cache_query(wanted), normalize_cache_query(row_artist)
+    return bool(wanted and have) and (f' {wanted} ' in f' {have} ' or f' {have} ' in f' {wanted} ')
+
+
+def album_track_metadata(playlist_id: Optional[str], title: str) -> Optional[Dict[str, Any]]:
+    """Match a video title against its playlist's iTunes results; None if not prefetched or no match.
+
+    When the title names an artist ("Artist - Song"), a row only matches if its artist agrees,
+    so a same-named song by someone else never lends its album, track number or artwork.
+    """
+    fut = _ALBUM_CACHE.get(playlist_id) if playlist_id else None
+    if fut is None:
+        return None
+    try:
+        index = fut.result(timeout=15)
+    except Exception:
+        return None
+    if not index:
         return None
+    clean_title = clean_youtube_title(title)
+    parts = split_artist_title(clean_title)
+    for candidate in ([parts[1]] if parts else []) + [clean_title]:
+        rows = index.get(normalize_cache_query(candidate)) or []
+        match = next((row for row in rows if not parts or _artist_matches(parts[0], row['artist'])), None)
+        if match:
+            print(f"✓ Metadata found in playlist results: {match['artist']} - {match['title']}")
+            return dict(match)
+    return None
 
 
 def lookup_last_fm(title: str) -> Optional[Dict[str, Any]]:
@@ -355,47 +842,187 @@ def lookup_last_fm(title: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+_ARTWORK_SIZE_RE = re.compile(r'\d+x\d+bb')
+
+
+def _read_body(r: requests.Response) -> bytes:
+    """Read a streamed response body, straight into one pre-sized buffer when the length is known."""
+    n = int(r.headers.get('Content-Length') or 0)
+    if not n or r.headers.get('Content-Encoding', 'identity') != 'identity':
+        # Unknown or compressed length: let urllib3 decode and accumulate
+        r.raw.decode_content = True
+        return r.raw.read()
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        chunk = r.raw.readinto(view[got:])
+        if not chunk:
+            break
+        got += chunk
+    return bytes(view[:got])
+
+
 def download_artwork(url: str) -> Optional[bytes]:
-    """Download album artwork from URL using a fresh session"""
+    """Download album artwork from URL using the pooled session for its host, cached on disk by URL"""
+    cache_file = ARTWORK_CACHE_DIR / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.jpg"
+    try:
+        if time.time() - cache_file.stat().st_mtime <= CACHE_TTL_SECONDS:
+            return cache_file.read_bytes()
+    except OSError:
+        pass
     try:
-        with requests.Session() as session:
-            r = session.get(url, timeout=10)
+        with get_session(urlparse(url).netloc).get(url, timeout=10, stream=True) as r:
             r.raise_for_status()
-            return r.content
+            data = _read_body(r)
     except Exception:
         return None
+    try:
+        ARTWORK_CACHE_DIR.mkdir(exist_ok=True)
+        tmp = cache_file.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        tmp.replace(cache_file)
+    except OSError:
+        pass
+    return data
+
+
+def artwork_url_for_size(url: str, size: int) -> str:
+    """Rewrite an iTunes artwork URL (…/600x600bb.jpg) to request a size×size variant."""
+    return _ARTWORK_SIZE_RE.sub(f'{size}x{size}bb', url, count=1)
+
+
+def shrink_artwork(data: bytes, max_size: int = DEFAULT_COVER_SIZE) -> bytes:
+    """Downscale and re-encode cover art as JPEG (Q85) if Pillow is installed.
+
+    Keeps the original bytes when Pillow is missing, decoding fails, or the result isn't smaller.
+    """
+    if Image is None:
+        return data
+    try:
+        im = Image.open(io.BytesIO(data)).convert('RGB')
+        im.thumbnail((max_size, max_size), Image.LANCZOS)
+        buf = io.BytesIO()
+        im.save(buf, 'JPEG', quality=85, optimize=True, progressive=False)
+    except Exception:
+        return data
+    shrunk = buf.getvalue()
+    return shrunk if len(shrunk) < len(data) else data
+
+
+def load_id3(mp3_path) -> ID3:
+    """Open the file's ID3 tag, or start an empty one if it has none yet."""
+    try:
+        return ID3(str(mp3_path))
+    except ID3NoHeaderError:
+        return ID3()
+
+
+def save_id3(tags: ID3, mp3_path):
+    """Write all pending frames in one pass."""
+    # Fixed padding leaves room for later re-tags without shifting the audio payload
+    tags.save(str(mp3_path), v2_version=3, padding=lambda info: 4096)
+
+
+def youtube_comment_frame(video_id: Optional[str]) -> COMM:
+    return COMM(
+        encoding=3,
+        lang='eng',
+        desc='',
+        text=[f"YouTube: {video_id}" if video_id else "Downloaded from YouTube"]
+    )
+
+
+# ---------- Metadata prefetch ----------
+_META_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="meta-prefetch")
+_pending_meta: Dict[str, Future] = {}
+
+
+def metadata_from_info(info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Build tags from yt-dlp's own music fields, if it found a track and artist (YouTube Music)."""
+    title, artist = info.get('track'), info.get('artist')
+    if not title or not artist:
+        return None
+    thumbnail = info.get('thumbnail') or ''
+    return {
+        'title': title,
+        'artist': artist,
+        'album': info.get('album') or '',
+        'album_artist': info.get('album_artist') or artist,
+        'genre': info.get('genre') or '',
+        'date': str(info.get('release_year') or ''),
+        'track_number': str(info.get('track_number') or ''),
+        # APIC frames are written as JPEG; skip webp thumbnails
+        'artwork_url': thumbnail if urlparse(thumbnail).path.endswith('.jpg') else '',
+    }
+
+
+def _prefetch_meta(title: str, cover_size: int, playlist_id: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], Optional[bytes]]:
+    metadata = album_track_metadata(playlist_id, title) or get_music_metadata_from_title(title)
+    artwork_url = metadata.get('artwork_url') if metadata else None
+    return metadata, download_artwork(artwork_url_for_size(artwork_url, cover_size)) if artwork_url else None
+
+
+def start_metadata_prefetch(info: Dict[str, Any], cover_size: int = DEFAULT_COVER_SIZE):
+    """Schedule the metadata + artwork lookup for a video whose download just finished."""
+    if os.environ.get('YTMP3_SKIP_TAG') or os.environ.get('YTMP3_SKIP_METADATA'):
+        return
+    video_id, title = info.get('id'), info.get('title')
+    if not video_id or not title or video_id in _pending_meta or metadata_from_info(info):
+        return
+    # The first song of a playlist (normally playlist_index 1) fetches iTunes rows for all of them
+    playlist_id = info.get('playlist_id')
+    if playlist_id and info.get('playlist_title'):
+        _prefetch_album_itunes(playlist_id, info['playlist_title'], info.get('playlist_uploader') or info.get('uploader'))
+    _pending_meta[video_id] = _META_EXECUTOR.submit(with_caller_output(_prefetch_meta, title, cover_size, playlist_id))
+
+
+def take_prefetched_metadata(video_id: Optional[str]) -> Optional[Tuple[Optional[Dict[str, Any]], Optional[bytes]]]:
+    """Return the (metadata, artwork) prefetched for video_id, or None to look it up inline."""
+    fut = _pending_meta.pop(video_id, None) if video_id else None
+    if fut is None:
+        return None
+    try:
+        return fut.result(timeout=30)
+    except Exception as e:
+        print(f"⚠ Metadata prefetch failed: {e}")
+        return None
 
 
-def tag_mp3_with_metadata(mp3_path: Path, video_title: str, uploader: Optional[str] = None, video_id: Optional[str] = None, playlist_info: Optional[Dict[str, Any]] = None):
+def tag_mp3_with_metadata(mp3_path: Path, video_title: str, uploader: Optional[str] = None, video_id: Optional[str] = None, playlist_info: Optional[Dict[str, Any]] = None,
+                          prefetched: Optional[Tuple[Optional[Dict[str, Any]], Optional[bytes]]] = None,
+                          cover_size: int = DEFAULT_COVER_SIZE):
     """
     Tag MP3 file with metadata from online music services.
     Assumes the video is a music video and looks up proper metadata.
+    `prefetched` is the (metadata, artwork) pair from start_metadata_prefetch, if any.
     """
     
     if os.environ.get('YTMP3_SKIP_TAG'):
         print("Skipping tagging (YTMP3_SKIP_TAG set)")
         return
     
-    # Validate that the file is a proper MP3 file
-    import time
-    max_attempts = 10
-    for attempt in range(max_attempts):
-        try:
-            # Try to load the MP3 file to verify it's valid
-            test_mp3 = MP3(str(mp3_path))
-            if test_mp3.info.length > 0:  # File has audio data
-                break
-        except Exception as e:
-            if attempt < max_attempts - 1:
-                print(f"MP3 not ready yet (attempt {attempt + 1}), waiting...")
-                time.sleep(1)
-                continue
-            else:
-                print(f"⚠ MP3 file validation failed after {max_attempts} attempts: {e}")
-                return
+    # post_hook only runs once the postprocessor has finished writing the file, so a
+    # single size check is enough to catch empty/failed transcodes
+    try:
+        size = mp3_path.stat().st_size
+    except OSError:
+        size = 0
+    if size < MIN_MP3_BYTES:
+        print("⚠ MP3 file not ready or empty, skipping tagging")
+        return
     
-    # Get metadata from online services
-    metadata = get_music_metadata_from_title(video_title)
+    # Get metadata from online services (usually already fetched during the ffmpeg step).
+    # YTMP3_SKIP_METADATA only skips the network calls: yt-dlp's own track fields still apply.
+    skip_online = bool(os.environ.get('YTMP3_SKIP_METADATA'))
+    artwork_data = None
+    if prefetched is not None:
+        metadata, artwork_data = prefetched
+    elif skip_online:
+        print("Skipping online metadata lookup (YTMP3_SKIP_METADATA set)")
+        metadata = None
+    else:
+        metadata = album_track_metadata((playlist_info or {}).get('playlist_id'), video_title) or get_music_metadata_from_title(video_title)
     
     if not metadata:
         print("⚠ No metadata found online, using basic info from video")
@@ -432,80 +1059,53 @@ def tag_mp3_with_metadata(mp3_path: Path, video_title: str, uploader: Optional[s
     
     # Apply metadata to MP3 file
     try:
-        # Load MP3 file and ensure it has tags
-        audio_file = MP3(str(mp3_path))
-        if audio_file.tags is None:
-            audio_file.add_tags()
-            audio_file.save()
+        # All frames go into one ID3 object that is written once
+        tags = load_id3(mp3_path)
         
-        # Use EasyID3 for standard tags
-        easy_tags = EasyID3(str(mp3_path))
-        
-        # Clear existing tags first to avoid conflicts
-        easy_tags.clear()
-        
-        # Apply all available metadata
-        if metadata.get('title'):
-            easy_tags['title'] = [metadata['title']]
-        if metadata.get('artist'):
-            easy_tags['artist'] = [metadata['artist']]
-        if metadata.get('album'):
-            easy_tags['album'] = [metadata['album']]
-        if metadata.get('album_artist'):
-            easy_tags['albumartist'] = [metadata['album_artist']]
-        if metadata.get('genre'):
-            easy_tags['genre'] = [metadata['genre']]
-        if metadata.get('date'):
-            easy_tags['date'] = [str(metadata['date'])]
-        if metadata.get('track_number'):
-            easy_tags['tracknumber'] = [str(metadata['track_number'])]
-        
-        easy_tags.save()
-        print("✓ Metadata applied")
+        # Replace the frames we manage to avoid conflicts with existing tags
+        text_frames = [
+            (TIT2, metadata.get('title')),
+            (TPE1, metadata.get('artist')),
+            (TALB, metadata.get('album')),
+            (TPE2, metadata.get('album_artist')),
+            (TCON, metadata.get('genre')),
+            (TDRC, metadata.get('date')),
+            (TRCK, metadata.get('track_number')),
+        ]
+        for frame_cls, value in text_frames:
+            tags.delall(frame_cls.__name__)
+            if value:
+                tags.add(frame_cls(encoding=3, text=[str(value)]))
         
-        # Add comment and encoder using raw ID3 (since EasyID3 doesn't support them)
-        try:
-            id3_tags = ID3(str(mp3_path))
-            
-            # Add comment
-            id3_tags.add(COMM(
-                encoding=3,
-                lang='eng',
-                desc='',
-                text=[f"YouTube: {video_id}" if video_id else "Downloaded from YouTube"]
-            ))
-            
-            # Add encoder info using TSSE frame
-            id3_tags.add(TSSE(encoding=3, text='YoutubeMp3Converter'))
-            
-            id3_tags.save(v2_version=3)
-        except Exception as id3_e:
-            print(f"⚠ Extended tags failed: {id3_e}")
+        # Comment and encoder info
+        tags.delall('COMM')
+        tags.add(youtube_comment_frame(video_id))
+        tags.add(TSSE(encoding=3, text='YoutubeMp3Converter'))
         
         # Add album artwork if available
+        artwork_added = False
         artwork_url = metadata.get('artwork_url')
-        if artwork_url:
-            artwork_data = download_artwork(artwork_url)
+        if artwork_url and (artwork_data or not skip_online):
+            artwork_data = artwork_data or download_artwork(artwork_url_for_size(artwork_url, cover_size))
             if artwork_data:
-                try:
-                    tags = ID3(str(mp3_path))
-                    # Remove existing artwork
-                    for key in list(tags.keys()):
-                        if key.startswith('APIC'):
-                            del tags[key]
-                    
-                    # Add new artwork
-                    tags.add(APIC(
-                        encoding=3,
-                        mime='image/jpeg',
-                        type=3,  # Cover (front)
-                        desc='Cover',
-                        data=artwork_data
-                    ))
-                    tags.save(v2_version=3)
-                    print("✓ Album artwork added")
-                except Exception as art_e:
-                    print(f"⚠ Artwork embedding failed: {art_e}")
+                artwork_data = shrink_artwork(artwork_data, cover_size)
+                # Remove existing artwork
+                tags.delall('APIC')
+                
+                # Add new artwork
+                tags.add(APIC(
+                    encoding=3,
+                    mime='image/jpeg',
+                    type=3,  # Cover (front)
+                    desc='Cover',
+                    data=artwork_data
+                ))
+                artwork_added = True
+        
+        save_id3(tags, mp3_path)
+        print("✓ Metadata applied")
+        if artwork_added:
+            print("✓ Album artwork added")
         
         if metadata.get('album'):
             print(f"  📀 {metadata['album']}")
@@ -536,11 +1136,96 @@ def tag_mp3(mp3_path: Path, base_title: str, uploader: Optional[str] = None):
 
 
 # ---------- yt-dlp options ----------
-def make_ydl_opts(outdir: str, bitrate: str, allow_playlist: bool, alt: bool = False, processed_files: Optional[set] = None):
-    # Use provided processed_files set or create a new one
-    if processed_files is None:
-        processed_files = set()
+def tag_downloaded(filepath: str, info: Dict[str, Any], cover_size: int = DEFAULT_COVER_SIZE):
+    """Tag a finished MP3 from its yt-dlp info, falling back to basic title/artist tags."""
+    print(f"🎵 Processing: {Path(filepath).name}")
+    record_download(info, filepath)
+
+    base_title = info.get('title') or Path(filepath).stem
+    uploader = info.get('artist') or info.get('uploader')
+    video_id = info.get('id')
+    
+    # Extract playlist information
+    playlist_info = None
+    if info.get('playlist') or info.get('playlist_title'):
+        playlist_info = {
+            'playlist_title': info.get('playlist_title'),
+            'playlist_id': info.get('playlist_id'),
+            'playlist_index': info.get('playlist_index'),
+            'playlist_count': info.get('playlist_count')
+        }
+    
+    # Ensure metadata lookup isolation by clearing any potential caches
+    # This prevents metadata leakage between different songs
+    print(f"📋 Title: {base_title}")
+    print(f"👤 Uploader: {uploader}")
+    if playlist_info:
+        print(f"📁 Playlist: {playlist_info.get('playlist_title')} ({playlist_info.get('playlist_index')}/{playlist_info.get('playlist_count')})")
     
+    # YouTube Music uploads already carry track/artist/album; no lookup needed for those
+    info_meta = metadata_from_info(info)
+    prefetched = (info_meta, None) if info_meta else take_prefetched_metadata(video_id)
+    
+    try:
+        tag_mp3_with_metadata(Path(filepath), base_title, uploader, video_id, playlist_info,
+                              prefetched=prefetched, cover_size=cover_size)
+    except Exception as e:
+        print(f"⚠ Metadata lookup failed: {e}")
+        # Fallback to basic tagging
+        try:
+            tags = load_id3(filepath)
+            tags.add(TIT2(encoding=3, text=[base_title]))
+            if uploader:
+                tags.add(TPE1(encoding=3, text=[uploader]))
+            tags.add(youtube_comment_frame(video_id))
+            save_id3(tags, filepath)
+            print("✓ Basic tags applied")
+        except Exception as e2:
+            print(f"⚠ All tagging failed: {e2}")
+
+
+# ffmpeg runs in its own process, so threads are enough to keep it off the download loop
+_TRANSCODE_EXECUTOR = ThreadPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) // 2), thread_name_prefix="transcode")
+
+
+def _mp3_quality_args(bitrate: str) -> List[str]:
+    """ffmpeg quality args for --bitrate, read the way yt-dlp's FFmpegExtractAudio reads them.
+
+    Values above 10 are a CBR bitrate in kbps; 0-10 is a LAME VBR quality (-q:a, 0 = best),
+    so every download path produces the same encode for the same flag.
+    """
+    value = bitrate.strip().lower()
+    quality = float(value[:-1] if value.endswith('k') else value)
+    if quality > 10:
+        return ['-b:a', f'{quality:g}k']
+    return ['-q:a', f'{quality:g}']
+
+
+def _transcode_to_mp3(ffmpeg: str, src: str, bitrate: str) -> str:
+    """Encode a downloaded audio stream to MP3 next to it, remove the original and return the MP3 path."""
+    dst = str(Path(src).with_suffix('.mp3'))
+    if dst == src:
+        return dst
+    subprocess.run(
+        [ffmpeg, '-nostdin', '-loglevel', 'error', '-y', '-i', src, '-vn', '-c:a', 'libmp3lame', *_mp3_quality_args(bitrate), dst],
+        check=True,
+    )
+    os.unlink(src)
+    return dst
+
+
+def transcode_and_tag(src: str, info: Dict[str, Any], bitrate: str, cover_size: int = DEFAULT_COVER_SIZE) -> str:
+    """Runs on _TRANSCODE_EXECUTOR (via with_caller_output): ffmpeg the raw download to MP3, then tag it."""
+    mp3_path = _transcode_to_mp3(ensure_ffmpeg(), src, bitrate)
+    tag_downloaded(mp3_path, info, cover_size)
+    return mp3_path
+
+
+def make_ydl_opts(outdir: str, bitrate: str, allow_playlist: bool, alt: bool = False,
+                  concurrency: int = DEFAULT_FRAGMENT_CONCURRENCY, cover_size: int = DEFAULT_COVER_SIZE, transcode: bool = True,
+                  verbose: bool = False):
+    # post_hook dedupes through the current thread's pooled set (cleared per URL), so the options
+    # (and the YoutubeDL built from them) can be reused across URLs
     def post_hook(d):
         # After post-processing; MP3 should exist now.
         if d.get('status') != 'finished':
@@ -582,48 +1267,17 @@ def make_ydl_opts(outdir: str, bitrate: str, allow_playlist: bool, alt: bool = F
             return
             
         # Prevent duplicate processing of the same file
-        if filepath in processed_files:
+        seen = thread_processed_files()
+        if filepath in seen:
             return
-        processed_files.add(filepath)
+        seen.add(filepath)
             
-        print(f"🎵 Processing: {Path(filepath).name}")
+        tag_downloaded(filepath, info, cover_size)
 
-        base_title = info.get('title') or Path(filepath).stem
-        uploader = info.get('artist') or info.get('uploader')
-        video_id = info.get('id')
-        
-        # Extract playlist information
-        playlist_info = None
-        if info.get('playlist') or info.get('playlist_title'):
-            playlist_info = {
-                'playlist_title': info.get('playlist_title'),
-                'playlist_id': info.get('playlist_id'),
-                'playlist_index': info.get('playlist_index'),
-                'playlist_count': info.get('playlist_count')
-            }
-        
-        # Ensure metadata lookup isolation by clearing any potential caches
-        # This prevents metadata leakage between different songs
-        print(f"📋 Title: {base_title}")
-        print(f"👤 Uploader: {uploader}")
-        if playlist_info:
-            print(f"📁 Playlist: {playlist_info.get('playlist_title')} ({playlist_info.get('playlist_index')}/{playlist_info.get('playlist_count')})")
-        
-        try:
-            tag_mp3_with_metadata(Path(filepath), base_title, uploader, video_id, playlist_info)
-        except Exception as e:
-            print(f"⚠ Metadata lookup failed: {e}")
-            # Fallback to basic tagging
-            try:
-                easy_tags = EasyID3(str(filepath))
-                easy_tags['title'] = [base_title]
-                if uploader:
-                    easy_tags['artist'] = [uploader]
-                easy_tags['comment'] = [f"YouTube: {video_id}" if video_id else "Downloaded from YouTube"]
-                easy_tags.save()
-                print("✓ Basic tags applied")
-            except Exception as e2:
-                print(f"⚠ All tagging failed: {e2}")
+    def prefetch_hook(d):
+        # Look up tags while ffmpeg transcodes so they're ready when post_hook runs
+        if d.get('status') == 'finished':
+            start_metadata_prefetch(d.get('info_dict') or {}, cover_size)
 
     # Common robust options
     opts = {
@@ -635,16 +1289,21 @@ def make_ydl_opts(outdir: str, bitrate: str, allow_playlist: bool, alt: bool = F
             # Remove FFmpegMetadata as we handle all metadata in our custom post_hook
         ],
         'prefer_ffmpeg': True,
+        'ffmpeg_location': ensure_ffmpeg(),  # skip yt-dlp's own PATH lookup
+        'allowed_extractors': ALLOWED_EXTRACTORS,
         'noplaylist': not allow_playlist,
         # Robustness to avoid empty files:
-        'retries': 3,  # Reduced from 10 to prevent hanging
+        'retries': 2,  # download_with_retries handles longer outages
         'fragment_retries': 3,
         'retry_sleep': 'exponential',
-        'concurrent_fragment_downloads': 1,  # serial fragments
+        'concurrent_fragment_downloads': max(1, concurrency),  # 1 = serial fragments (--safe)
+        'http_chunk_size': HTTP_CHUNK_SIZE,
+        'buffersize': 1024 * 1024,           # read size outside a deadline (TimeoutHandler caps it)
         'nopart': True,                      # write directly to final file
         'quiet': True,
         'no_warnings': True,
-        'progress_hooks': [progress_hook],
+        'logger': _BufLogger(verbose),
+        'progress_hooks': [progress_hook, prefetch_hook, DeadlineHook()],  # one DeadlineHook per YoutubeDL
         'postprocessor_hooks': [post_hook],
         'geo_bypass': True,
         # Add timeout settings to prevent hanging
@@ -652,9 +1311,16 @@ def make_ydl_opts(outdir: str, bitrate: str, allow_playlist: bool, alt: bool = F
         'http_timeout': 30,
     }
 
+    if not transcode:
+        # The caller runs ffmpeg and tagging itself (see transcode_and_tag)
+        opts['postprocessors'] = []
+        opts['postprocessor_hooks'] = []
+
     if alt:
-        # Alternate extractor hints that often fix edge cases
+        # Alternate extractor hints that often fix edge cases. This is a recovery path, so
+        # fragments stay serial: parallel fetches can re-trigger whatever broke the primary attempt
         opts.update({
+            'concurrent_fragment_downloads': 1,
             'extractor_args': {'youtube': {'player_client': ['android', 'tv']}},
             'http_chunk_size': 10485760,  # 10MB chunks
             'http_headers': {
@@ -671,6 +1337,152 @@ def make_ydl_opts(outdir: str, bitrate: str, allow_playlist: bool, alt: bool = F
     return opts
 
 
+_worker_state = threading.local()
+_open_ydls: List[YoutubeDL] = []
+_open_ydls_lock = threading.Lock()
+
+
+def _opts_overlay(base: Dict[str, Any], overlay: Dict[str, Any], drop: Iterable[str] = ()) -> Dict[str, Any]:
+    """Copy of base without the drop keys and with overlay applied; nested values stay shared."""
+    opts = {k: v for k, v in base.items() if k not in drop}
+    opts.update(overlay)
+    return opts
+
+
+def thread_processed_files() -> set:
+    """Files already tagged by the current thread's download; cleared before each URL."""
+    files = getattr(_worker_state, 'processed_files', None)
+    if files is None:
+        files = _worker_state.processed_files = set()
+    return files
+
+
+def worker_ydl(profile: str, args: argparse.Namespace) -> YoutubeDL:
+    """Return the current thread's YoutubeDL for an options profile ('primary', 'batch', 'fallback', 'alt' or 'probe').
+
+    Each instance loads every extractor on construction, so a worker builds one per profile
+    and reuses it for all of its URLs. 'batch' leaves transcoding to the caller, 'fallback'
+    has no player-client hints and is retargeted with set_ydl_format(), and 'probe' only
+    extracts info (--list-formats, --test-metadata). Closed by close_worker_ydls().
+    """
+    ydls = getattr(_worker_state, 'ydls', None)
+    if ydls is None:
+        ydls = _worker_state.ydls = {}
+    ydl = ydls.get(profile)
+    if ydl is None:
+        concurrency = 1 if args.safe else args.concurrency
+        opts = make_ydl_opts(args.outdir, args.bitrate, args.allow_playlist, alt=(profile == 'alt'),
+                             concurrency=concurrency, cover_size=args.cover_size, transcode=(profile != 'batch'),
+                             verbose=args.verbose)
+        if profile == 'fallback':
+            opts = _opts_overlay(opts, {}, drop=('extractor_args',))  # do not constrain when an explicit format is chosen
+        elif profile == 'probe':
+            opts = _opts_overlay(opts, {'skip_download': True, 'progress_hooks': [], 'postprocessor_hooks': []},
+                                 drop=('format', 'extractor_args', 'postprocessors'))
+        ydl = ydls[profile] = YoutubeDL(opts)
+        with _open_ydls_lock:
+            _open_ydls.append(ydl)
+    return ydl
+
+
+def set_ydl_format(ydl: YoutubeDL, spec: str):
+    """Point an existing YoutubeDL at another format spec (the selector is compiled at __init__)."""
+    ydl.params['format'] = spec
+    ydl.format_selector = ydl.build_format_selector(spec)
+
+
+def close_worker_ydls():
+    with _open_ydls_lock:
+        while _open_ydls:
+            _open_ydls.pop().close()
+
+
+# ---------- Info cache ----------
+_INFO_CACHE: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+_INFO_CACHE_LOCK = threading.Lock()
+
+
+def extract_info_cached(ydl: YoutubeDL, url: str) -> Dict[str, Any]:
+    """Extract (but don't process) info for url, reusing an extraction from the last few minutes.
+
+    Keyed by URL and player clients, since different clients return different formats.
+    Only single-video results are cached: playlist results carry a lazy `entries` generator
+    that can be neither copied nor replayed. Each caller gets its own deep copy because
+    process_ie_result fills in format fields in place.
+    """
+    key = (url, repr(ydl.params.get('extractor_args')))
+    now = time.monotonic()
+    with _INFO_CACHE_LOCK:
+        # Drop expired entries so a long batch doesn't hold every URL's formats and captions
+        for stale in [k for k, (ts, _) in _INFO_CACHE.items() if now - ts >= INFO_CACHE_TTL_SECONDS]:
+            del _INFO_CACHE[stale]
+        entry = _INFO_CACHE.get(key)
+    if entry:
+        return copy.deepcopy(entry[1])
+    info = ydl.extract_info(url, download=False, process=False)
+    if info.get('_type', 'video') != 'video':
+        return info
+    with _INFO_CACHE_LOCK:
+        _INFO_CACHE[key] = (time.monotonic(), info)
+    return copy.deepcopy(info)
+
+
+def download_cached(ydl: YoutubeDL, url: str):
+    """Like ydl.download([url]), but a retry with different format options skips the info extractor."""
+    ydl.process_ie_result(extract_info_cached(ydl, url), download=True)
+
+
+# ---------- Retries ----------
+_TRANSIENT_RE = re.compile(r'timed out|connection|temporary failure|http error 5\d\d', re.IGNORECASE)
+
+
+def _is_transient(e: Exception) -> bool:
+    """Network hiccups (timeouts, resets, 5xx) that are worth retrying with the same options."""
+    return _TRANSIENT_RE.search(str(e)) is not None
+
+
+def download_with_retries(ydl: YoutubeDL, url: str):
+    """Download url, retrying transient failures with backoff and a longer timeout each time.
+
+    Other errors (and the last transient one) are raised for the caller's fallback ladder.
+    """
+    for attempt in range(DOWNLOAD_ATTEMPTS):
+        try:
+            with TimeoutHandler(ydl, 60 * (attempt + 1)):
+                download_cached(ydl, url)
+            return
+        except Exception as e:
+            if attempt == DOWNLOAD_ATTEMPTS - 1 or not _is_transient(e):
+                raise
+            delay = min(2 ** attempt, 8)
+            print(f"⚠ Transient error, retrying in {delay}s: {e}")
+            time.sleep(delay)
+
+
+# Errors a specific format pick can fix ("requested format ...", 403s, empty files, formats
+# not available). A failed signature extraction can't be, and anything else goes straight
+# to the alternate extraction strategy.
+_FORMAT_ERR_RE = re.compile(r'format|http error 403|empty file|not available', re.IGNORECASE)
+_NO_FORMAT_FIX_RE = re.compile(r'signature extraction failed', re.IGNORECASE)
+
+
+def format_fix_may_help(msg: str) -> bool:
+    """True if the primary attempt's error msg is one a different format choice can fix."""
+    return _FORMAT_ERR_RE.search(msg) is not None and _NO_FORMAT_FIX_RE.search(msg) is None
+
+
+def _try_download(ydl: YoutubeDL, url: str, label: str, timeout: int = 120) -> bool:
+    """One fallback attempt: download url with ydl, reporting the outcome under label."""
+    try:
+        with TimeoutHandler(ydl, timeout):
+            download_cached(ydl, url)
+    except Exception as e:
+        print(f"❌ {label} failed: {e}")
+        return False
+    print(f"✅ Done ({label})")
+    return True
+
+
 # ---------- Fallback format selection ----------
 def pick_best_audio_format(formats: List[dict]) -> Optional[str]:
     """Select the best audio-only format id based on abr (audio bitrate).
@@ -694,27 +1506,19 @@ def pick_best_audio_format(formats: List[dict]) -> Optional[str]:
             f.get('asr') or 0,
             f.get('filesize') or f.get('filesize_approx') or 0,
         )
-    audio_only.sort(key=sort_key, reverse=True)
-    return audio_only[0].get('format_id')
+    return max(audio_only, key=sort_key).get('format_id')
+
 
+def attempt_manual_format(url: str, ydl: YoutubeDL) -> bool:
+    """Fallback: extract info without downloading, pick a viable audio stream, then download.
 
-def attempt_manual_format(url: str, outdir: str, bitrate: str, allow_playlist: bool) -> bool:
-    """Fallback: extract info without downloading, pick a viable audio stream, then download."""
+    ydl should be the 'fallback' profile: no player-client hints, so extraction is broad.
+    The pick is made from the real format list, so there is one download attempt.
+    """
     print("Attempting manual format selection…")
     
-    # Create fresh processed_files for manual format attempt
-    manual_processed_files = set()
-    base_opts = make_ydl_opts(outdir, bitrate, allow_playlist, processed_files=manual_processed_files)
-    
-    # We only need metadata first; silence progress for this step.
-    meta_opts = dict(base_opts)
-    # Remove restrictive entries so extraction is broad
-    meta_opts.pop('format', None)
-    meta_opts.pop('extractor_args', None)
-    meta_opts.update({'quiet': True, 'progress_hooks': [], 'postprocessor_hooks': [], 'skip_download': True})
     try:
-        with YoutubeDL(meta_opts) as ydl_meta:
-            info = ydl_meta.extract_info(url, download=False)
+        info = extract_info_cached(ydl, url)
     except Exception as e:
         print(f"Could not extract formats: {e}")
         return False
@@ -731,35 +1535,241 @@ def attempt_manual_format(url: str, outdir: str, bitrate: str, allow_playlist: b
             return False
     print(f"Chosen audio format id: {chosen}")
     # Now re-run with explicit format id and fresh processed_files
-    dl_processed_files = set()
-    dl_opts = make_ydl_opts(outdir, bitrate, allow_playlist, processed_files=dl_processed_files)
-    dl_opts['format'] = chosen
-    dl_opts.pop('extractor_args', None)  # do not constrain when explicit format chosen
+    thread_processed_files().clear()
+    set_ydl_format(ydl, chosen)
+    return _try_download(ydl, url, "manual format")
+
+
+# ---------- Download cache ----------
+# normalized URL -> {"title", "path", "mtime"} for every video already converted into the output directory
+_download_cache: Dict[str, Dict[str, Any]] = {}
+_download_cache_path: Optional[Path] = None
+_DOWNLOAD_CACHE_LOCK = threading.Lock()
+
+
+def load_download_cache(outdir: Path):
+    global _download_cache, _download_cache_path
+    _download_cache_path = outdir.resolve() / DOWNLOAD_CACHE_NAME
     try:
-        with YoutubeDL(dl_opts) as ydl_dl:
-            ydl_dl.download([url])
-        print("✅ Done (manual format)")
-        return True
-    except Exception as e:
-        print(f"Manual format attempt failed: {e}")
-        return False
+        _download_cache = json.loads(_download_cache_path.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        _download_cache = {}
+    except (OSError, ValueError) as e:
+        print(f"⚠ Ignoring unreadable download cache: {e}")
+        _download_cache = {}
+
+
+def existing_mp3s(outdir: Path) -> Set[str]:
+    """Names of the MP3s in outdir, from one directory scan rather than a stat per URL."""
+    try:
+        with os.scandir(outdir) as it:
+            return {e.name for e in it if e.name.endswith('.mp3') and e.is_file()}
+    except FileNotFoundError:
+        return set()
+
+
+def cached_download(url: str, existing: Set[str]) -> Optional[Dict[str, Any]]:
+    """The cache entry for url if its MP3 is still in the output directory, else None."""
+    entry = _download_cache.get(url)
+    if not entry or _download_cache_path is None:
+        return None
+    path = Path(entry.get('path') or '')
+    if path.parent == _download_cache_path.parent:
+        return entry if path.name in existing else None
+    # Recorded before the output directory moved; check the file itself
+    return entry if path.is_file() else None
+
+
+def record_download(info: Dict[str, Any], mp3_path: str):
+    """Remember a finished single-video download; the cache file is rewritten atomically."""
+    url = info.get('original_url') or info.get('webpage_url')
+    # Playlist runs produce many files per URL, so they are never skipped
+    if _download_cache_path is None or not url or info.get('playlist_id'):
+        return
+    # Only real MP3s are recorded, so a listed file never needs a size check on later runs
+    try:
+        if os.stat(mp3_path).st_size < MIN_MP3_BYTES:
+            return
+    except OSError:
+        return
+    with _DOWNLOAD_CACHE_LOCK:
+        _download_cache[url] = {'title': info.get('title'), 'path': str(Path(mp3_path).resolve()), 'mtime': time.time()}
+        tmp = _download_cache_path.with_suffix('.tmp')
+        try:
+            tmp.write_text(json.dumps(_download_cache, ensure_ascii=False), encoding='utf-8')
+            tmp.replace(_download_cache_path)
+        except OSError as e:
+            print(f"⚠ Could not write download cache: {e}")
 
 
 # ---------- CLI ----------
-def load_urls(url: Optional[str], listfile: Path, allow_playlist: bool) -> List[str]:
+_BANNER = '=' * 60
+_FORMAT_FIELDS = ('format_id', 'ext', 'acodec', 'vcodec', 'abr', 'tbr', 'format_note')
+_FORMAT_DEFAULTS = dict.fromkeys(_FORMAT_FIELDS, '')
+_format_fields = operator.itemgetter(*_FORMAT_FIELDS)
+_FORMAT_ROW = "%3s %4s %12s %12s %4s %4s %s"  # one --list-formats line
+
+
+def _format_row(f: Dict[str, Any]) -> str:
+    """One --list-formats line; missing and None fields print blank."""
+    return _FORMAT_ROW % tuple('' if v is None else v for v in _format_fields({**_FORMAT_DEFAULTS, **f}))
+
+
+def load_urls(url: Optional[str], listfile: Path, allow_playlist: bool) -> Iterator[str]:
+    """Yield normalized URLs, streaming the list file line by line instead of reading it whole.
+
+    Repeated URLs (after normalization) are yielded once, in first-seen order.
+    """
     if url:
-        return [normalize_url(url, allow_playlist)]
-    if not listfile.exists():
+        yield normalize_url(url, allow_playlist)
+        return
+    try:
+        fh = listfile.open('r', encoding="utf-8", buffering=1 << 20)
+    except FileNotFoundError:
         sys.exit(f"No URL provided and list file not found: {listfile}")
-    urls: List[str] = []
-    for line in listfile.read_text(encoding="utf-8").splitlines():
-        s = line.strip()
-        if not s or s.startswith('#'):
-            continue
-        urls.append(normalize_url(s, allow_playlist))
-    if not urls:
+    seen = set()
+    duplicates = 0
+    with fh:
+        for line in fh:
+            s = line.strip()
+            if not s or s.startswith('#'):
+                continue
+            u = normalize_url(s, allow_playlist)
+            if u in seen:
+                duplicates += 1
+                continue
+            seen.add(u)
+            yield u
+    if not seen:
         sys.exit(f"No valid URLs found in {listfile}.")
-    return urls
+    if duplicates:
+        print(f"Skipped {duplicates} duplicate URL(s) in {listfile}")
+
+
+_probe_local = threading.local()
+
+
+def _probe_info(url: str, opts: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract (but don't process) info for url with a YoutubeDL owned by the current worker thread.
+
+    The instance is registered in _open_ydls so close_worker_ydls() closes it too.
+    """
+    ydl = getattr(_probe_local, 'ydl', None)
+    if ydl is None:
+        ydl = _probe_local.ydl = YoutubeDL(opts)
+        with _open_ydls_lock:
+            _open_ydls.append(ydl)
+    # Cached so a URL that fails the batch pass doesn't pay for extraction again in process_url
+    with buffered_output():
+        return extract_info_cached(ydl, url)
+
+
+def batch_download(urls: List[str], args: argparse.Namespace) -> List[str]:
+    """Happy-path pass: probe every URL in parallel, then download them in order with one YoutubeDL.
+
+    Info extraction (player JS fetch, signature functions) for later URLs runs while earlier
+    ones download, and each finished download is transcoded and tagged on _TRANSCODE_EXECUTOR
+    while the next one downloads. Returns the URLs that failed so the caller can run the
+    per-URL fallback sequence on them.
+    """
+    ydl = worker_ydl('batch', args)
+    probe_opts = _opts_overlay(ydl.params, {'progress_hooks': [], 'postprocessor_hooks': [], 'skip_download': True})
+
+    if not args.json:
+        print(f"\n{_BANNER}\nBatch downloading {len(urls)} URLs\n{_BANNER}")
+    failed = set()
+    transcodes: Dict[str, Future] = {}
+    with ThreadPoolExecutor(max_workers=min(8, len(urls)), thread_name_prefix="probe") as prefetch:
+        info_futures = [prefetch.submit(_probe_info, u, probe_opts) for u in urls]
+        for i, (u, fut) in enumerate(zip(urls, info_futures), 1):
+            with buffered_output(f"[{i}/{len(urls)}]"):
+                print(f"[{i}/{len(urls)}] {u}")
+                try:
+                    info = fut.result()
+                    with TimeoutHandler(ydl, 120):
+                        result = ydl.process_ie_result(info, download=True)
+                    downloads = result.get('requested_downloads') or [result]
+                    src = downloads[0].get('filepath')
+                    if not src:
+                        raise Exception("yt-dlp reported no downloaded file")
+                    transcodes[u] = _TRANSCODE_EXECUTOR.submit(
+                        with_caller_output(transcode_and_tag, src, result, args.bitrate, args.cover_size))
+                except Exception as e:
+                    print(f"❌ Batch attempt failed: {e}")
+                    failed.add(u)
+    for u, fut in transcodes.items():
+        try:
+            fut.result()
+        except Exception as e:
+            print(f"❌ Transcode failed for {u}: {e}")
+            failed.add(u)
+    return [u for u in urls if u in failed]
+
+
+def process_url(i: int, total: int, u: str, args: argparse.Namespace) -> Optional[str]:
+    """Run the full primary/fallback download sequence for one URL.
+
+    Primary and alternate attempts reuse the calling thread's YoutubeDL instances (YoutubeDL
+    is not safe to share between threads). Returns u on failure, None on success.
+    """
+    with buffered_output(f"[{i}/{total}]"):
+        return _process_url(i, total, u, args)
+
+
+def _process_url(i: int, total: int, u: str, args: argparse.Namespace) -> Optional[str]:
+    if not args.json:
+        print(f"\n{_BANNER}\n[{i}/{total}] Processing: {u}\n{_BANNER}")
+
+    # Clear the thread's processed_files for each download to prevent cross-contamination
+    thread_processed_files().clear()
+
+    if args.verbose:
+        print(f"🔄 Reset download state for download {i}")
+
+    try:
+        if args.verbose:
+            print(f"Using (normalized): {u}")
+        if args.list_formats:
+            info = worker_ydl('probe', args).extract_info(u, download=False)
+            rows = [_format_row(f) for f in info.get('formats') or []]
+            sys.stdout.write("id  ext  acodec        vcodec        abr  tbr  note\n" + ''.join(row + '\n' for row in rows))
+            return None
+        if args.test_metadata:
+            info = worker_ydl('probe', args).extract_info(u, download=False)
+            title = info.get('title', 'Unknown Title')
+            print(f"Video title: {title}")
+            print("Testing metadata lookup...")
+            metadata = get_music_metadata_from_title(title)
+            if metadata:
+                print("✓ Metadata found:")
+                for key, value in metadata.items():
+                    if value:
+                        print(f"  {key.title()}: {value}")
+            else:
+                print("✗ No metadata found")
+            return None
+        print("Starting download...")
+
+        # A DeadlineHook timeout arrives wrapped in yt-dlp's UnavailableVideoError, so it is
+        # handled (and reported) by the fallback ladder below like any other failure.
+        download_with_retries(worker_ydl('primary', args), u)
+        print("Download completed successfully")
+        print("✅ Done")
+        return None
+    except Exception as e:
+        msg = str(e)
+        print(f"Primary attempt failed: {msg}")
+        # One informed format pick from the probed format list, not a ladder of guesses
+        if format_fix_may_help(msg) and attempt_manual_format(u, worker_ydl('fallback', args)):
+            return None
+
+        # Final fallback with alternate extraction strategy
+        print("Retrying with alternate strategy…")
+        # Clear processed_files for final fallback too
+        thread_processed_files().clear()
+        if _try_download(worker_ydl('alt', args), u, "alternate"):
+            return None
+        return u
 
 
 def main():
@@ -771,126 +1781,70 @@ def main():
     p.add_argument("--file", default=str(DEFAULT_LISTFILE), help=f"Alternate list file (default: {DEFAULT_LISTFILE})")
     p.add_argument("--list-formats", action="store_true", help="List available formats for the URL(s) (no download)")
     p.add_argument("--test-metadata", action="store_true", help="Test metadata lookup for the URL(s) (no download)")
+    p.add_argument("--jobs", type=int, default=None, help=f"Number of URLs to process in parallel (default: min({DEFAULT_JOBS}, number of URLs); 1 = serial)")
+    p.add_argument("--concurrency", "--fragments", type=int, default=DEFAULT_FRAGMENT_CONCURRENCY, help=f"Concurrent fragment downloads per URL (default: {DEFAULT_FRAGMENT_CONCURRENCY})")
+    p.add_argument("--safe", action="store_true", help="Download fragments serially, for unreliable networks")
+    p.add_argument("--json", action="store_true", help="Print only a JSON summary ({failed, total, skipped, outdir}) on stdout; logs go to stderr")
+    p.add_argument("-v", "--verbose", action="store_true", help="Print per-URL setup details")
+    p.add_argument("--force", action="store_true", help=f"Download again even if a URL is already converted (see {DOWNLOAD_CACHE_NAME} in the output directory)")
+    p.add_argument("--cover-size", type=int, choices=COVER_SIZES, default=DEFAULT_COVER_SIZE, help=f"Album artwork size in px to fetch from iTunes (default: {DEFAULT_COVER_SIZE})")
     args = p.parse_args()
 
     ensure_ffmpeg()
     os.makedirs(args.outdir, exist_ok=True)
+    # With --json, stdout carries only the summary so scripts can parse it; logs go to stderr
+    summary_out = sys.stdout
+    sys.stdout = _ThreadStdout(sys.stderr if args.json else sys.stdout)
 
-    urls = load_urls(args.url, Path(args.file), args.allow_playlist)
-    failures: List[str] = []
-
-    # Process each URL with its own isolated environment
-    for i, u in enumerate(urls, 1):
-        print(f"\n{'='*60}")
-        print(f"[{i}/{len(urls)}] Processing: {u}")
-        print(f"{'='*60}")
-        
-        # Create a fresh processed_files set for each download to prevent cross-contamination
-        processed_files = set()
-        ydl_opts = make_ydl_opts(args.outdir, args.bitrate, args.allow_playlist, processed_files=processed_files)
-        
-        print(f"🔄 Created isolated environment for download {i}")
+    # Only the normalized URLs are kept; the list file itself is streamed
+    urls = list(load_urls(args.url, Path(args.file), args.allow_playlist))
+    total = len(urls)
+    load_download_cache(Path(args.outdir))
+    if not (args.force or args.list_formats or args.test_metadata):
+        existing = existing_mp3s(Path(args.outdir))
+        pending = []
+        for u in urls:
+            entry = cached_download(u, existing)
+            if entry:
+                print(f"✓ cached: {entry.get('title') or u}")
+            else:
+                pending.append(u)
+        urls = pending
+    failed = set()
+    if args.jobs is None:
+        # Capped so a big batch doesn't trip YouTube's rate limits
+        args.jobs = min(DEFAULT_JOBS, len(urls))
 
-        try:
-            print(f"Using (normalized): {u}")
-            if args.list_formats:
-                tmp_opts = dict(ydl_opts)
-                tmp_opts.pop('format', None)
-                tmp_opts.pop('extractor_args', None)
-                with YoutubeDL(tmp_opts) as ydl_list:
-                    info = ydl_list.extract_info(u, download=False)
-                formats = info.get('formats') or []
-                print("id  ext  acodec        vcodec        abr  tbr  note")
-                for f in formats:
-                    print(f"{f.get('format_id'):>3} {f.get('ext'):>4} {str(f.get('acodec')):>12} {str(f.get('vcodec')):>12} {str(f.get('abr')):>4} {str(f.get('tbr')):>4} {f.get('format_note')}")
-                continue
-            if args.test_metadata:
-                tmp_opts = dict(ydl_opts)
-                tmp_opts.pop('format', None)
-                tmp_opts.pop('extractor_args', None)
-                with YoutubeDL(tmp_opts) as ydl_meta:
-                    info = ydl_meta.extract_info(u, download=False)
-                title = info.get('title', 'Unknown Title')
-                print(f"Video title: {title}")
-                print("Testing metadata lookup...")
-                metadata = get_music_metadata_from_title(title)
-                if metadata:
-                    print("✓ Metadata found:")
-                    for key, value in metadata.items():
-                        if value:
-                            print(f"  {key.title()}: {value}")
-                else:
-                    print("✗ No metadata found")
-                continue
-            print("Starting download...")
-            
-            # Create a fresh YoutubeDL instance for each download
-            with YoutubeDL(ydl_opts) as ydl:
-                try:
-                    with TimeoutHandler(120):  # 2 minute timeout
-                        ydl.download([u])
-                    print("Download completed successfully")
-                except TimeoutError as te:
-                    print(f"❌ Download timed out: {te}")
-                    raise Exception(f"Download timed out after 120 seconds")
-            print("✅ Done")
-        except Exception as e:
-            msg = str(e)
-            print(f"Primary attempt failed: {msg}")
-            # Try fallback sequence for format issues  
-            if any(phrase in msg.lower() for phrase in ['format', 'not available', 'empty file']):
-                # Optimized format sequence based on actual success patterns
-                alt_specs = [
-                    'bestaudio',           # This consistently works
-                    'best[height<=720]',   # Lower quality fallback
-                    'best',                # Final fallback
-                ]
-                success = False
-                for spec in alt_specs:
-                    try:
-                        print(f"Trying format: {spec}")
-                        # Create fresh processed_files for fallback attempts too
-                        fallback_processed_files = set()
-                        spec_opts = make_ydl_opts(args.outdir, args.bitrate, args.allow_playlist, processed_files=fallback_processed_files)
-                        spec_opts['format'] = spec
-                        spec_opts.pop('extractor_args', None)
-                        with YoutubeDL(spec_opts) as ydl_spec:
-                            with TimeoutHandler(120):
-                                ydl_spec.download([u])
-                        print(f"✅ Done (spec {spec})")
-                        success = True
-                        break
-                    except Exception as spec_err:
-                        print(f"❌ {spec} failed")
-                
-                if success:
-                    continue
-                
-                # If format specs failed, try manual format selection
-                if attempt_manual_format(u, args.outdir, args.bitrate, args.allow_playlist):
-                    continue
-            
-            # Final fallback with alternate extraction strategy
-            print("Retrying with alternate strategy…")
-            try:
-                # Create fresh processed_files for final fallback too
-                final_processed_files = set()
-                alt_opts = make_ydl_opts(args.outdir, args.bitrate, args.allow_playlist, alt=True, processed_files=final_processed_files)
-                with YoutubeDL(alt_opts) as ydl2:
-                    with TimeoutHandler(120):
-                        ydl2.download([u])
-                print("✅ Done (alternate)")
-            except Exception as e2:
-                print(f"❌ Failed: {e2}")
-                failures.append(u)
+    if args.jobs <= 1:
+        pending = urls
+        if len(urls) > 1 and not (args.list_formats or args.test_metadata or args.allow_playlist):
+            pending = batch_download(urls, args)
+            if pending:
+                print(f"\n{len(pending)} of {len(urls)} URLs need a retry")
+        for i, u in enumerate(pending, 1):
+            if process_url(i, len(pending), u, args):
+                failed.add(u)
+    else:
+        # Overlap one URL's fragment download with another's ffmpeg encode + tagging
+        with ThreadPoolExecutor(max_workers=args.jobs) as ex:
+            futures = [ex.submit(process_url, i, len(urls), u, args) for i, u in enumerate(urls, 1)]
+            for fut in as_completed(futures):
+                failed_url = fut.result()
+                if failed_url:
+                    failed.add(failed_url)
+    close_worker_ydls()
+    failures = [u for u in urls if u in failed]
 
     if failures:
-        print("\nSome downloads failed:")
-        for u in failures:
-            print(f" - {u}")
-        sys.exit(1)
-    else:
+        sys.stderr.write("\nSome downloads failed:\n" + "".join(f" - {u}\n" for u in failures))
+    elif not args.json:
         print(f"\nAll done. Files saved to: {args.outdir}")
+    if args.json:
+        summary = {'failed': failures, 'total': total, 'skipped': total - len(urls), 'outdir': args.outdir}
+        summary_out.write(json.dumps(summary) + "\n")
+        summary_out.flush()
+    if failures:
+        sys.exit(1)
 
 
 if __name__ == "__main__":